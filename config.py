@@ -2,20 +2,23 @@
 Configuration file for Bank Reviews Analysis Project
 """
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (values already set in the environment take precedence)
+load_dotenv(override=False)
+
+# Environment-backed settings are exposed read-only so callers cannot mutate them
 
 # Google Play Store App IDs (CBE, BOA, Dashen)
-APP_IDS = {
+APP_IDS = MappingProxyType({
     # Commercial Bank of Ethiopia
     'CBE': os.getenv('CBE_APP_ID', 'com.combanketh.mobilebanking'),
     # Bank of Abyssinia (BOA) - Using their official app ID
     'BOA': os.getenv('BOA_APP_ID', 'com.boa.boaMobileBanking'),
     # Dashen Bank - Using their SuperApp ID
     'Dashen': os.getenv('DASHEN_APP_ID', 'com.dashen.dashensuperapp')
-}
+})
 
 # Bank Names Mapping
 BANK_NAMES = {
@@ -25,12 +28,12 @@ BANK_NAMES = {
 }
 
 # Scraping Configuration
-SCRAPING_CONFIG = {
+SCRAPING_CONFIG = MappingProxyType({
     'reviews_per_bank': int(os.getenv('REVIEWS_PER_BANK', 600)),
     'max_retries': int(os.getenv('MAX_RETRIES', 3)),
     'lang': 'en',
     'country': 'et'  # Ethiopia
-}
+})
 
 # File Paths
 DATA_PATHS = {
@@ -44,13 +47,13 @@ DATA_PATHS = {
 
 
 # Note: These values should be set in your project's .env file
-DB_CONFIG = {
+DB_CONFIG = MappingProxyType({
     'HOST': os.getenv('PG_HOST', 'localhost'),
     'DATABASE': os.getenv('PG_DATABASE', 'bank_reviews'),
     'USER': os.getenv('PG_USER', 'postgres_user'),
     'PASSWORD': os.getenv('PG_PASSWORD', 'your_secure_password'),
     'PORT': os.getenv('PG_PORT', 5432)
-}
+})
 
 # List of columns expected in the final CSV file for validation
 EXPECTED_COLUMNS = [
@@ -5,26 +5,156 @@ This script loads the processed review data (reviews_final.csv) into
 a PostgreSQL database. It has been updated to include the 'identified_theme'
 column generated during the thematic analysis (Task 2).
 """
+import numpy as np
 import pandas as pd
 import psycopg2
-from psycopg2 import extras
+from psycopg2 import extensions, extras, pool
+import io
 import os
+import struct
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Add parent directory to path to allow importing modules from there (if necessary for config)
+# config.py lives next to this script, so it is importable without touching sys.path
 try:
-    # Assuming config.py is one level up
-    sys.path.append(os.path.abspath(os.path.join(os.getcwd(), os.pardir)))
     from config import DATA_PATHS, DB_CONFIG, EXPECTED_COLUMNS, BANK_NAMES
 except ImportError:
     # Fallback/Debug note if running from a different location
-    print("FATAL: Could not import config.py. Check sys.path setup.")
+    print("FATAL: Could not import config.py. Run this script from the project root.")
     sys.exit(1)
 
+# Column order used when streaming review rows to PostgreSQL
+REVIEW_COLUMNS = [
+    'bank_id', 'review_text', 'rating', 'review_date',
+    'sentiment_label', 'sentiment_score', 'identified_theme'
+]
 
-def connect_to_db(config):
-    """Establishes a connection to the PostgreSQL database with retries."""
+# Fixed schema of reviews_final.csv, so pandas can skip dtype inference on load.
+# rating/sentiment_score are left out so a malformed value is coerced and dropped
+# by validate_reviews() instead of failing the whole read.
+REVIEW_CSV_DTYPES = {
+    'bank_code': 'category',
+    'review_text': 'string',
+    'review_date': 'string',
+    'sentiment_label': 'string',
+    'identified_theme': 'string'
+}
+
+# Value ranges accepted for the numeric review columns
+RATING_RANGE = (1, 5)
+SENTIMENT_SCORE_RANGE = (-1.0, 1.0)  # VADER compound score
+
+# Leading calendar date of a review_date cell, optionally followed by a time part
+DATE_PREFIX_PATTERN = r'^\s*(\d{4}-\d{2}-\d{2})(?:[T ]|$)'
+
+# Advisory lock key guarding schema creation/migration in create_tables
+SCHEMA_LOCK_KEY = 4242424242
+
+# Rows encoded per chunk when streaming reviews to COPY (bounds peak memory)
+COPY_CHUNK_ROWS = 10_000
+
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks, for COPY FROM STDIN."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._pending:
+            try:
+                self._pending = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+# PostgreSQL binary COPY framing: signature, flags and header-extension length
+_PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+_PGCOPY_TRAILER = struct.pack('!h', -1)
+_PG_EPOCH = np.datetime64('2000-01-01', 'D')  # DATE values are days since this epoch
+
+_FIELD_COUNT = struct.Struct('!h')
+_INT4_FIELD = struct.Struct('!ii')    # length (4) + int4 value
+_FIELD_LENGTH = struct.Struct('!i')
+_NULL_FIELD = _FIELD_LENGTH.pack(-1)
+
+# sentiment_score is NUMERIC(5, 4): sent as base-10000 digits with a display scale of 4.
+# Layout: length, ndigits, weight, sign, dscale, digits (|score| < 10, see SENTIMENT_SCORE_RANGE)
+_SCORE_DSCALE = 4
+_NUMERIC_FRAC_FIELD = struct.Struct('!ihhhhh')    # 0.xxxx -> one digit, weight -1
+_NUMERIC_WHOLE_FIELD = struct.Struct('!ihhhhhh')  # n.xxxx -> two digits, weight 0
+_NUMERIC_POS = 0x0000
+_NUMERIC_NEG = 0x4000
+
+
+def _encode_text(series, encoding):
+    """Encodes a text column to bytes, mapping missing values to None."""
+    values = series.astype(object).where(series.notna(), None).tolist()
+    return [None if v is None else str(v).encode(encoding) for v in values]
+
+
+def _encode_scores(series):
+    """Encodes sentiment scores as binary NUMERIC(5, 4) fields, rounding half away from zero."""
+    scores = series.to_numpy('float64')
+    scaled = np.floor(np.abs(scores) * 10 ** _SCORE_DSCALE + 0.5).astype('int64')
+    whole, frac = np.divmod(scaled, 10 ** _SCORE_DSCALE)
+    signs = np.where((scores < 0) & (scaled > 0), _NUMERIC_NEG, _NUMERIC_POS)
+    return [
+        _NUMERIC_FRAC_FIELD.pack(10, 1, -1, sign, _SCORE_DSCALE, f) if not w
+        else _NUMERIC_WHOLE_FIELD.pack(12, 2, 0, sign, _SCORE_DSCALE, w, f)
+        for w, f, sign in zip(whole.tolist(), frac.tolist(), signs.tolist())
+    ]
+
+
+def _binary_copy_chunks(df, encoding, chunk_rows=COPY_CHUNK_ROWS):
+    """
+    Yields the review rows (in REVIEW_COLUMNS order) in PostgreSQL's binary COPY
+    format, chunk_rows rows at a time.
+    """
+    field_count = _FIELD_COUNT.pack(len(REVIEW_COLUMNS))
+    yield _PGCOPY_HEADER
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        days = (chunk['review_date'].to_numpy('datetime64[D]') - _PG_EPOCH).astype('int64')
+        columns = zip(
+            chunk['bank_id'].to_numpy('int64').tolist(),
+            _encode_text(chunk['review_text'], encoding),
+            chunk['rating'].to_numpy('int64').tolist(),
+            days.tolist(),
+            _encode_text(chunk['sentiment_label'], encoding),
+            _encode_scores(chunk['sentiment_score']),
+            _encode_text(chunk['identified_theme'], encoding)
+        )
+
+        buf = bytearray()
+        for bank_id, text, rating, day, label, score, theme in columns:
+            buf += field_count
+            buf += _INT4_FIELD.pack(4, bank_id)
+            buf += _NULL_FIELD if text is None else _FIELD_LENGTH.pack(len(text)) + text
+            buf += _INT4_FIELD.pack(4, rating)
+            buf += _INT4_FIELD.pack(4, day)
+            buf += _NULL_FIELD if label is None else _FIELD_LENGTH.pack(len(label)) + label
+            buf += score
+            buf += _NULL_FIELD if theme is None else _FIELD_LENGTH.pack(len(theme)) + theme
+        yield bytes(buf)
+    yield _PGCOPY_TRAILER
+
+
+# Shared connection pool, created lazily by connect_to_db and reused across runs
+_CONNECTION_POOL = None
+
+
+def _create_pool(config):
+    """Creates the connection pool, retrying with exponential backoff."""
     max_retries = 3
     # Convert DB_CONFIG keys to lowercase for psycopg2 compatibility
     corrected_config = {k.lower(): v for k, v in config.items()}
@@ -32,7 +162,9 @@ def connect_to_db(config):
     for attempt in range(max_retries):
         try:
             print(f"Attempting to connect to PostgreSQL (Attempt {attempt + 1}/{max_retries})...")
-            conn = psycopg2.connect(
+            conn_pool = pool.ThreadedConnectionPool(
+                minconn=1,
+                maxconn=2,
                 host=corrected_config['host'],
                 database=corrected_config['database'],
                 user=corrected_config['user'],
@@ -40,7 +172,7 @@ def connect_to_db(config):
                 port=corrected_config['port']
             )
             print("✓ Database connection successful.")
-            return conn
+            return conn_pool
         except psycopg2.OperationalError as e:
             print(f"Connection failed: {e}")
             if attempt < max_retries - 1:
@@ -53,6 +185,33 @@ def connect_to_db(config):
     return None
 
 
+def connect_to_db(config):
+    """
+    Borrows a connection from the shared pool, creating the pool on first use.
+    Connections must be handed back with release_connection().
+    """
+    global _CONNECTION_POOL
+    if _CONNECTION_POOL is None or _CONNECTION_POOL.closed:
+        _CONNECTION_POOL = _create_pool(config)
+        if _CONNECTION_POOL is None:
+            return None
+
+    conn = _CONNECTION_POOL.getconn()
+    if conn.closed:
+        # The server dropped this connection since its last use; replace it
+        _CONNECTION_POOL.putconn(conn, close=True)
+        conn = _CONNECTION_POOL.getconn()
+    return conn
+
+
+def release_connection(conn):
+    """Returns a connection to the shared pool (rolling back any open transaction)."""
+    if _CONNECTION_POOL is not None and not _CONNECTION_POOL.closed:
+        _CONNECTION_POOL.putconn(conn)
+    else:
+        conn.close()
+
+
 def create_tables(conn):
     """
     Creates the necessary tables (banks and reviews) or ensures they exist.
@@ -92,8 +251,28 @@ def create_tables(conn):
     # This prevents errors if you run the script multiple times without dropping tables.
     ALTER_REVIEWS_THEME = "DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='reviews' AND column_name='identified_theme') THEN ALTER TABLE reviews ADD COLUMN identified_theme VARCHAR(100); END IF; END $$;"
     
+    # 4. Cheap probe so steady-state runs (schema already in place) issue no DDL at all
+    PROBE_SCHEMA_SQL = """
+    SELECT
+        to_regclass('banks') IS NOT NULL,
+        to_regclass('reviews') IS NOT NULL,
+        EXISTS (
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = to_regclass('reviews')
+              AND attname = 'identified_theme'
+              AND NOT attisdropped
+        );
+    """
+    
     try:
         with conn.cursor() as cur:
+            cur.execute(PROBE_SCHEMA_SQL)
+            if all(cur.fetchone()):
+                print("  - Schema is up to date; skipping table creation/migration.")
+                return
+
+            # Serialize concurrent loaders on the DDL; released automatically at commit/rollback
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_KEY,))
             cur.execute(CREATE_BANKS_TABLE)
 
             print("  - Table 'banks' ensured to exist.")
@@ -102,7 +281,6 @@ def create_tables(conn):
             # Execute the alter table logic
             cur.execute(ALTER_REVIEWS_THEME)
             print("  - Column 'identified_theme' ensured to exist in 'reviews'.")
-            conn.commit()
     except Exception as e:
         print(f"✗ An error occurred during table creation/alteration: {e}")
         conn.rollback()
@@ -120,31 +298,28 @@ def insert_banks(conn, bank_codes):
     # Prepare data for insertion (code and full name)
     # BANK_NAMES is imported from config.py
     # NOTE: app_name is left NULL here if not available, as it's not in the current CSV
-    bank_data = [(code, BANK_NAMES.get(code, code)) for code in bank_codes]
+    # Building a dict first also de-duplicates codes, which a single upsert statement requires
+    bank_data = list({code: BANK_NAMES.get(code, code) for code in bank_codes}.items())
     
-    # SQL to insert or update banks
-    INSERT_BANK_SQL = """
+    # SQL to insert or update banks and return their IDs in the same round trip.
+    # DO UPDATE (rather than DO NOTHING) is needed so existing banks are RETURNed too.
+    UPSERT_BANK_SQL = """
     INSERT INTO banks (bank_code, bank_name)
-    VALUES (%s, %s)
-    ON CONFLICT (bank_code) DO NOTHING;
+    VALUES %s
+    ON CONFLICT (bank_code) DO UPDATE SET bank_name = EXCLUDED.bank_name
+    RETURNING bank_id, bank_code;
     """
     
-    # SQL to fetch ALL existing banks and their IDs for the lookup map
-    SELECT_BANKS_SQL = "SELECT bank_id, bank_code FROM banks;"
-    
     try:
         with conn.cursor() as cur:
-            # Using execute_batch for fast bank insertion
-            psycopg2.extras.execute_batch(cur, INSERT_BANK_SQL, bank_data)
-            
-            # Fetch all bank IDs to create the lookup map
-            cur.execute(SELECT_BANKS_SQL)
-            results = cur.fetchall()
+            # Using execute_values to send all banks in a single multi-row INSERT
+            results = psycopg2.extras.execute_values(
+                cur, UPSERT_BANK_SQL, bank_data, page_size=1000, fetch=True
+            )
             
             for bank_id, bank_code in results:
                 bank_id_lookup[bank_code] = bank_id
                 
-            conn.commit()
             print(f"✓ Banks inserted/verified. Found {len(bank_id_lookup)} unique banks.")
             return bank_id_lookup
             
@@ -160,44 +335,42 @@ def insert_reviews(conn, df, bank_id_lookup):
     """
     print("\nInserting review records into 'reviews' table...")
     
-    data_to_insert = []
-    
-    for index, row in df.iterrows():
-        bank_code = row['bank_code']
-        bank_id = bank_id_lookup.get(bank_code)
-        
-        if bank_id is None:
-            print(f"Warning: Skipping review for unknown bank code: {bank_code}")
-            continue
-            
-        data_to_insert.append((
-            bank_id,
-            row['review_text'],
-            int(row['rating']), 
-            row['review_date'],
-            row['sentiment_label'],
-            float(row['sentiment_score']),
-            row['identified_theme'] # <--- NEW VALUE: Add the identified theme
-        ))
-
-    # Define the SQL command, updated to include the new column
-    INSERT_REVIEW_SQL = """
-    INSERT INTO reviews (
+    # Resolve bank ids for the whole column at once and drop unknown banks
+    bank_id_series = df['bank_code'].map(bank_id_lookup)
+    unknown = bank_id_series.isna()
+    if unknown.any():
+        skipped = df.loc[unknown, 'bank_code'].value_counts()
+        skipped = skipped[skipped > 0]  # a categorical bank_code also counts unused categories
+        print(f"Warning: Skipping {int(unknown.sum())} reviews for unknown bank codes: {skipped.to_dict()}")
+    df = df.assign(bank_id=bank_id_series)[~unknown].astype({'bank_id': 'int64', 'rating': 'int32', 'sentiment_score': 'float64'})
+
+    # Bulk-load straight into 'reviews' with COPY. There is no natural key on
+    # reviews (only the SERIAL review_id), so re-running the load inserts the
+    # rows again; clear the table first if a full reload is intended.
+    COPY_REVIEWS_SQL = """
+    COPY reviews (
         bank_id, review_text, rating, review_date, sentiment_label, sentiment_score, identified_theme
     )
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
-    -- Using ON CONFLICT DO NOTHING to ensure idempotent loads (no duplicate insertion)
-    ON CONFLICT DO NOTHING; 
+    FROM STDIN WITH (FORMAT BINARY);
     """
 
+    # Stream the rows to libpq chunk by chunk in binary COPY format, so the server
+    # stores the values directly instead of parsing text for every field
+    encoding = extensions.encodings[conn.encoding]
+    stream = _ChunkStream(_binary_copy_chunks(df, encoding))
+
     try:
         with conn.cursor() as cur:
-            psycopg2.extras.execute_batch(
-                cur, INSERT_REVIEW_SQL, data_to_insert, page_size=100
-            )
-            inserted_count = cur.rowcount
-            conn.commit()
-            print(f"✓ Successfully processed and inserted {inserted_count} reviews.")
+            # Every bank_id was resolved from the banks lookup above, so the per-row
+            # foreign key triggers can be skipped. This requires superuser rights.
+            skip_fk_checks = conn.get_parameter_status('is_superuser') == 'on'
+            if skip_fk_checks:
+                cur.execute("SET LOCAL session_replication_role = 'replica'")
+            cur.copy_expert(COPY_REVIEWS_SQL, stream)
+            if skip_fk_checks:
+                cur.execute("SET LOCAL session_replication_role = DEFAULT")
+            # COPY is all-or-nothing, so every row in df was written
+            print(f"✓ Successfully processed and inserted {len(df)} reviews.")
             
     except Exception as e:
         print(f"✗ An error occurred during review insertion: {e}")
@@ -205,6 +378,48 @@ def insert_reviews(conn, df, bank_id_lookup):
         raise
 
 
+def validate_reviews(df):
+    """
+    Coerces 'rating', 'sentiment_score' and 'review_date' in one pass each and drops
+    rows with invalid values, so they never reach the database (where a CHECK or
+    NOT NULL violation would abort the whole transaction).
+    """
+    rating = pd.to_numeric(df['rating'], errors='coerce').astype('float64')
+    score = pd.to_numeric(df['sentiment_score'], errors='coerce').astype('float64')
+    # Like PostgreSQL's DATE input, keep the calendar date as written and ignore any
+    # time/offset suffix: the PyArrow reader turns the whole column into
+    # 'YYYY-MM-DD 00:00:00' strings as soon as one cell looks like a timestamp.
+    # Reviews share few distinct dates, so the conversion cache parses each one once
+    day = df['review_date'].str.extract(DATE_PREFIX_PATTERN, expand=False)
+    review_date = pd.to_datetime(day, format='%Y-%m-%d', errors='coerce', cache=True)
+
+    valid = (
+        rating.between(*RATING_RANGE)
+        & (rating % 1 == 0)
+        & score.between(*SENTIMENT_SCORE_RANGE)
+        & review_date.notna()
+    )
+    invalid_count = int((~valid).sum())
+    if invalid_count:
+        print(f"Warning: Dropping {invalid_count} reviews with an invalid rating, sentiment score or date.")
+
+    return df[valid].assign(
+        rating=rating[valid].astype('int32'),
+        sentiment_score=score[valid],
+        review_date=review_date[valid]
+    )
+
+
+def load_reviews(input_file):
+    """Reads the final reviews CSV using the fixed column schema."""
+    return pd.read_csv(
+        input_file,
+        engine='pyarrow',
+        dtype_backend='pyarrow',
+        dtype=REVIEW_CSV_DTYPES
+    )
+
+
 def main():
 
     """Main function to run the data insertion pipeline."""
@@ -220,34 +435,49 @@ def main():
         print(f"ERROR: Input file not found at {input_file}. Please run the preprocessing/sentiment steps first.")
         return
 
-    try:
-        df = pd.read_csv(input_file)
-        
-        # Check for critical columns, including the new one
-        required_cols = ['bank_code', 'review_text', 'rating', 'review_date', 'sentiment_label', 'sentiment_score', 'identified_theme']
-        if not all(col in df.columns for col in required_cols):
-            missing = [col for col in required_cols if col not in df.columns]
-            print(f"ERROR: CSV is missing required columns, especially: {missing}. Did you run Task 2?")
-            return
-            
-        print(f"Successfully loaded {len(df)} records from {input_file}.")
-        
-    except Exception as e:
-        print(f"ERROR: Failed to load CSV file: {e}")
-        return
+    # --- 2. Read CSV and Connect to the Database ---
+    # The CSV parse and the TCP/auth handshake are independent, so overlap them
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        conn_future = executor.submit(connect_to_db, DB_CONFIG)
+        df_future = executor.submit(load_reviews, input_file)
 
     conn = None
     try:
-        # --- 2. Database Connection ---
-        conn = connect_to_db(DB_CONFIG)
+        conn = conn_future.result()
+
+        try:
+            df = df_future.result()
+            
+            # Check for critical columns, including the new one
+            required_cols = ['bank_code', 'review_text', 'rating', 'review_date', 'sentiment_label', 'sentiment_score', 'identified_theme']
+            if not all(col in df.columns for col in required_cols):
+                missing = [col for col in required_cols if col not in df.columns]
+                print(f"ERROR: CSV is missing required columns, especially: {missing}. Did you run Task 2?")
+                return
+
+            df = validate_reviews(df)
+            if df.empty:
+                print(f"ERROR: No valid review records left in {input_file}. Nothing to load.")
+                return
+                
+            print(f"Successfully loaded {len(df)} records from {input_file}.")
+            
+        except Exception as e:
+            print(f"ERROR: Failed to load CSV file: {e}")
+            return
+
         if conn is None:
             return
 
+        # Run the whole load as a single transaction (one commit, one WAL flush)
+        conn.autocommit = False
+
         # --- 3. Create Tables and Ensure Schema ---
         create_tables(conn)
 
         # --- 4. Get Unique Banks and Insert/Lookup ---
-        unique_bank_codes = df['bank_code'].unique()
+        # bank_code is categorical, so its categories are already the unique codes
+        unique_bank_codes = df['bank_code'].cat.categories.tolist()
         bank_id_lookup = insert_banks(conn, unique_bank_codes)
         
         if not bank_id_lookup:
@@ -256,6 +486,7 @@ def main():
 
         # --- 5. Insert Reviews (including theme) ---
         insert_reviews(conn, df, bank_id_lookup)
+        conn.commit()
         
         print("\n=======================================================")
         print(f"SUCCESS: ETL Process Complete! {len(df)} records inserted.")
@@ -268,10 +499,10 @@ def main():
             sys.exit(1)
         
     finally:
-        # --- 6. Close Connection ---
+        # --- 6. Release Connection ---
         if conn:
-            conn.close()
-            print("\nDatabase connection closed.")
+            release_connection(conn)
+            print("\nDatabase connection returned to pool.")
 
 
 if __name__ == "__main__":
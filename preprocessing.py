@@ -20,15 +20,78 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import pandas for data manipulation and analysis (DataFrames)
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from datetime import datetime
 import re
 # Import DATA_PATHS dictionary from the local config module
 from config import DATA_PATHS
 
+# Below this many rows the NumPy range check beats importing numba and JIT-compiling
+_NUMBA_MIN_ROWS = 10**6
+# Compiled rating kernel: None until first needed, False if numba is not installed
+_valid_rating_kernel = None
+
+# Runs of whitespace (newlines and carriage returns included) collapse to one space
+_RE_WS = re.compile(r'\s+')
+# Bound once so the per-row kernel skips the attribute lookup on the pattern
+_collapse_ws = _RE_WS.sub
+
+
+def _clean_text(text):
+    """Lowercase, collapse whitespace (incl. newlines) and strip in a single pass"""
+    return _collapse_ws(' ', str(text).lower()).strip()
+
+
+def _valid_rating_loop(ratings):
+    """Single-pass 1-5 range check over a float64 array; compiled by numba when used"""
+    out = np.empty(ratings.shape[0], np.bool_)
+    for i in range(ratings.shape[0]):
+        v = ratings[i]
+        out[i] = v >= 1.0 and v <= 5.0
+    return out
+
+
+def _get_valid_rating_kernel():
+    """Import numba and compile the rating kernel on first use (False without numba)"""
+    global _valid_rating_kernel
+    if _valid_rating_kernel is None:
+        try:
+            from numba import njit
+        except ImportError:
+            _valid_rating_kernel = False
+        else:
+            _valid_rating_kernel = njit(cache=True)(_valid_rating_loop)
+    return _valid_rating_kernel
+
+
+def _valid_rating_mask(ratings):
+    """Boolean mask of ratings within 1-5; NaN (missing or non-numeric) fails both comparisons"""
+    if len(ratings) >= _NUMBA_MIN_ROWS:
+        # Very large scrapes: one pass with no intermediate arrays, if numba is available
+        kernel = _get_valid_rating_kernel()
+        if kernel:
+            return kernel(ratings)
+    return (ratings >= 1) & (ratings <= 5)
+
 
 class ReviewPreprocessor:
     """Preprocessor class for review data"""
 
+    # Column types of the raw scrape, so read_csv can skip dtype inference.
+    # rating is left out so a malformed value is coerced and counted as an
+    # invalid rating by filter_reviews() instead of failing the whole read.
+    _READ_DTYPES = {
+        'review_text': 'string',
+        'reply_content': 'string',
+        'user_name': 'string',
+        'bank_code': 'category',
+        'bank_name': 'category',
+        'source': 'category',
+        'app_id': 'string',
+        'thumbs_up_count': 'Int32'
+    }
+
     def __init__(self, input_path=None, output_path=None):
         """
         Initialize preprocessor
@@ -42,7 +105,16 @@ class ReviewPreprocessor:
         """Load raw reviews data"""
         print("Loading raw data...")
         try:
-            self.df = pd.read_csv(self.input_path)
+            self.df = pd.read_csv(
+                self.input_path,
+                dtype=self._READ_DTYPES,
+                parse_dates=['review_date'],
+                # Only truly empty cells count as missing (not literal "NA"/"null" text)
+                keep_default_na=False,
+                na_values=[''],
+                engine='pyarrow',
+                dtype_backend='pyarrow'
+            )
             print(f"Loaded {len(self.df)} reviews")
             self.stats['original_count'] = len(self.df)
             return True
@@ -53,49 +125,59 @@ class ReviewPreprocessor:
             print(f"ERROR: Failed to load data: {str(e)}")
             return False
 
-    def remove_duplicates(self):
-        """Remove exact duplicate reviews"""
-        print("\n[1/6] Removing duplicates...")
-        initial_count = len(self.df)
-        
-        # Keep the first occurrence of duplicate review text + bank
-        self.df.drop_duplicates(subset=['review_text', 'bank_code'], keep='first', inplace=True)
-        
-        removed = initial_count - len(self.df)
-        self.stats['duplicates_removed'] = removed
-        print(f"Removed {removed} duplicates. Remaining records: {len(self.df)}")
+    def _duplicate_mask(self):
+        """Boolean mask of repeated review text + bank (the first occurrence is kept)"""
+        # Factorize the text once and fold the bank category codes into a single int64 key
+        text_codes, _ = pd.factorize(self.df['review_text'], use_na_sentinel=False)
+        bank = self.df['bank_code'].cat
+        keys = text_codes.astype(np.int64) * (len(bank.categories) + 1) + (bank.codes.to_numpy() + 1)
+        return pd.Series(keys).duplicated(keep='first').to_numpy()
 
-
-    def handle_missing_values(self):
-        """Handle missing data (remove critical, fill non-critical)"""
-        print("\n[2/6] Handling missing values...")
-        
-        initial_count = len(self.df)
-
-        # 1. Remove rows where CRITICAL columns are missing (review_text, rating, review_date)
-        critical_cols = ['review_text', 'rating', 'review_date']
-        self.df.dropna(subset=critical_cols, inplace=True)
-        
-        # 2. Fill non-critical missing values
-        # Fill missing 'reply_content' with an empty string
-        self.df['reply_content'] = self.df['reply_content'].fillna('')
-        # Fill missing 'app_id' with 'N/A'
-        self.df['app_id'] = self.df['app_id'].fillna('N/A')
-
-        removed = initial_count - len(self.df)
-        self.stats['rows_removed_missing'] = removed
-        self.stats['count_after_missing'] = len(self.df)
-        print(f"Removed {removed} rows with missing critical data.")
+    def filter_reviews(self):
+        """
+        Remove duplicates, rows missing critical data and invalid ratings in one pass.
+        Non-critical gaps (reply_content, app_id) are left as-is; neither column is
+        part of the final output.
+        """
+        print("\n[1/4] Removing duplicates, missing values and invalid ratings...")
+
+        # 1. Build every row predicate once over the full frame
+        ratings = pd.to_numeric(self.df['rating'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        duplicate = self._duplicate_mask()
+        # CRITICAL columns (review_text, rating, review_date) must be present
+        missing = (
+            self.df['review_text'].isna().to_numpy()
+            | self.df['rating'].isna().to_numpy()
+            | self.df['review_date'].isna().to_numpy()
+        )
+        valid_rating = _valid_rating_mask(ratings)
+
+        # 2. Attribute each dropped row to the first check it fails, in pipeline order
+        duplicates_removed = int(duplicate.sum())
+        missing_removed = int((~duplicate & missing).sum())
+        invalid_removed = int((~duplicate & ~missing & ~valid_rating).sum())
+
+        keep = ~duplicate & ~missing & valid_rating
+        # Ratings are 1-5, so int8 is enough
+        self.df = self.df.loc[keep].assign(rating=ratings[keep].astype(np.int8))
+
+        self.stats['duplicates_removed'] = duplicates_removed
+        self.stats['rows_removed_missing'] = missing_removed
+        self.stats['count_after_missing'] = len(self.df) + invalid_removed
+        self.stats['rows_removed_invalid_rating'] = invalid_removed
+        print(f"Removed {duplicates_removed} duplicates.")
+        print(f"Removed {missing_removed} rows with missing critical data.")
+        print(f"Removed {invalid_removed} rows with invalid ratings. Remaining: {len(self.df)}")
 
 
     def normalize_dates(self):
         """Normalize date formats to YYYY-MM-DD"""
-        print("\n[3/6] Normalizing dates...")
+        print("\n[2/4] Normalizing dates...")
         try:
-            # Convert the 'review_date' column to datetime objects
-            self.df['date'] = pd.to_datetime(self.df['review_date'], utc=True).dt.date
-            # Convert datetime objects back to the required string format YYYY-MM-DD
-            self.df['date'] = self.df['date'].astype(str)
+            # 'review_date' is already parsed to datetime by load_data; truncate it to
+            # day resolution and let NumPy format YYYY-MM-DD strings in C
+            days = self.df['review_date'].to_numpy(dtype='datetime64[D]')
+            self.df['date'] = np.datetime_as_string(days, unit='D')
             print("Date normalization to YYYY-MM-DD completed.")
         except Exception as e:
             print(f"ERROR during date normalization: {str(e)}")
@@ -104,42 +186,16 @@ class ReviewPreprocessor:
     def clean_text(self):
         """Clean the review text data (basic cleaning)"""
         
-        print("\n[4/6] Cleaning text data...")
-        # Function to apply basic text cleaning
-        def basic_text_clean(text):
-            if pd.isna(text):
-                return text
-            text = str(text).lower()
-            text = re.sub(r'[\r\n]+', ' ', text) # Remove newlines/carriage returns
-            text = re.sub(r'\s+', ' ', text).strip() # Replace multiple spaces with a single space
-            return text
-
-        # Apply cleaning to the review text
-        self.df['review_text'] = self.df['review_text'].apply(basic_text_clean)
-        self.df['reply_content'] = self.df['reply_content'].apply(basic_text_clean)
+        print("\n[3/4] Cleaning text data...")
+        # One fused pass per value; missing values are skipped by na_action
+        for col in ('review_text', 'reply_content'):
+            self.df[col] = self.df[col].map(_clean_text, na_action='ignore')
         print("Basic text cleaning completed (lowercasing, whitespace removal).")
 
     
-    def validate_ratings(self):
-        """Ensure rating values are within the 1-5 range and are integers"""
-        print("\n[5/6] Validating ratings...")
-        
-        # Convert rating to integer, coercing errors to NaN
-        self.df['rating'] = pd.to_numeric(self.df['rating'], errors='coerce', downcast='integer')
-        
-        # Remove rows where rating is missing or outside 1-5
-        initial_count = len(self.df)
-        self.df.dropna(subset=['rating'], inplace=True) # drop NaNs created by coercion
-        self.df = self.df[(self.df['rating'] >= 1) & (self.df['rating'] <= 5)]
-        
-        removed = initial_count - len(self.df)
-        self.stats['rows_removed_invalid_rating'] = removed
-        print(f"Removed {removed} rows with invalid ratings. Remaining: {len(self.df)}")
-
-
     def prepare_final_output(self):
         """Select and rename columns for the final required CSV format"""
-        print("\n[6/6] Preparing final output columns...")
+        print("\n[4/4] Preparing final output columns...")
         
         # Rename and select columns to match the required output: review, rating, date, bank, source
         self.df = self.df.rename(columns={
@@ -147,18 +203,25 @@ class ReviewPreprocessor:
             'bank_name': 'bank',
         })
 
-        # Select the final columns in the required order
-        self.df = self.df[[
+        # Select the final columns in the required order; .loc builds the new frame
+        # in one step (no extra defensive .copy()) and raises KeyError if a column,
+        # e.g. 'date' after a failed normalization, is missing
+        self.df = self.df.loc[:, [
             'review', 
             'rating', 
             'date', 
             'bank', 
             'source'
-        ]].copy()
+        ]]
         
         # Ensure the final columns are of the correct type
         self.df['rating'] = self.df['rating'].astype(int)
-        self.df['source'] = 'Google Play Store' # Ensure explicit source column
+        # Low-cardinality columns are stored as categories (one small code per row);
+        # the CSV still contains the plain string values
+        self.df['bank'] = self.df['bank'].astype('category')
+        self.df['source'] = pd.Categorical.from_codes(
+            np.zeros(len(self.df), dtype=np.int8), categories=['Google Play Store']
+        ) # Ensure explicit source column
         print("Final output columns prepared: review, rating, date, bank, source.")
 
 
@@ -168,7 +231,15 @@ class ReviewPreprocessor:
         try:
             # Ensure the processed data directory exists
             os.makedirs(DATA_PATHS['processed'], exist_ok=True)
-            self.df.to_csv(self.output_path, index=False, encoding='utf-8')
+            try:
+                # Arrow's CSV writer encodes columns in C and writes UTF-8 directly
+                table = pa.Table.from_pandas(self.df, preserve_index=False)
+                pacsv.write_csv(table, self.output_path)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Columns Arrow cannot convert (e.g. mixed object types): stream with pandas
+                # in bounded chunks instead of building the whole CSV in memory
+                self.df.to_csv(self.output_path, index=False, encoding='utf-8',
+                               chunksize=10_000, lineterminator='\n')
             self.stats['final_count'] = len(self.df)
             print(f"✓ Processed data saved successfully to: {self.output_path}")
             return True
@@ -182,9 +253,13 @@ class ReviewPreprocessor:
         print("PREPROCESSING REPORT")
         print("=" * 60)
         
+        # Read each removal count once
+        dup = self.stats.get('duplicates_removed', 0)
+        miss = self.stats.get('rows_removed_missing', 0)
+        badr = self.stats.get('rows_removed_invalid_rating', 0)
+
         # Calculate missing data percentage based on final count
-        missing_count = self.stats.get('rows_removed_missing', 0)
-        total_removed = self.stats.get('duplicates_removed', 0) + missing_count + self.stats.get('rows_removed_invalid_rating', 0)
+        total_removed = dup + miss + badr
         
         # For KPI check: What percentage of the *final* dataset's required columns (review, rating, date) are missing?
         # Since we dropped rows with missing critical data, the missing data percentage in the *final* output is 0%.
@@ -196,8 +271,8 @@ class ReviewPreprocessor:
         if original_count > 0:
             data_loss_pct = (total_removed / original_count) * 100
         print(f"Original Records (Raw Scrape): {original_count}")
-        print(f"Duplicates Removed: {self.stats.get('duplicates_removed', 0)}")
-        print(f"Rows Removed (Missing Critical Data/Invalid Rating): {missing_count + self.stats.get('rows_removed_invalid_rating', 0)}")            
+        print(f"Duplicates Removed: {dup}")
+        print(f"Rows Removed (Missing Critical Data/Invalid Rating): {miss + badr}")
         print("-" * 60)
         print(f"Final Records (Cleaned): {final_count}")
         print(f"Total Data Loss from Original: {total_removed} ({data_loss_pct:.2f}%)")
@@ -223,11 +298,9 @@ class ReviewPreprocessor:
             return False
 
         # Run each step of the pipeline in sequence
-        self.remove_duplicates()
-        self.handle_missing_values()
+        self.filter_reviews()
         self.normalize_dates()
         self.clean_text()
-        self.validate_ratings()
         self.prepare_final_output()
 
         # Attempt to save the data. If successful, generate the report.
@@ -11,14 +11,21 @@ import os
 # Add parent directory to path to allow importing modules from there (if running from a sub-directory)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from google_play_scraper import app, Sort, reviews_all, reviews
-import pandas as pd
+from google_play_scraper import app, Sort, reviews
+import csv
+from collections import Counter
 from datetime import datetime
 import time
-from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 # Import configuration from config.py
 from config import APP_IDS, BANK_NAMES, SCRAPING_CONFIG, DATA_PATHS
 
+# Columns of the raw reviews CSV, in output order
+REVIEW_COLUMNS = (
+    'review_id', 'user_name', 'review_text', 'rating', 'review_date',
+    'thumbs_up_count', 'reply_content', 'bank_code', 'bank_name', 'app_id', 'source'
+)
+
 
 class PlayStoreScraper:
     """Scraper class for Google Play Store reviews"""
@@ -31,104 +38,122 @@ class PlayStoreScraper:
         self.lang = SCRAPING_CONFIG['lang']
         self.country = SCRAPING_CONFIG['country']
         self.max_retries = SCRAPING_CONFIG['max_retries']
-        self.all_reviews = []
-
-    def _format_review(self, review, bank_code):
-        """Helper to format a single review into a flat dictionary"""
-        return {
-            'review_id': review.get('reviewId'),
-            'user_name': review.get('userName'),
-            'review_text': review.get('content'),
-            'rating': review.get('score'),
-            'review_date': review.get('at'),
-            'thumbs_up_count': review.get('thumbsUpCount', 0),
-            'reply_content': review.get('replyContent', None),
-            'bank_code': bank_code,
-            'bank_name': self.bank_names[bank_code],
-            'app_id': review.get('appVersion', 'N/A'),
-            'source': 'Google Play Store'
+
+    def _scrape_one(self, bank_code, app_id):
+        """
+        Scrape and format the reviews of a single app.
+        Returns the reviews as column lists local to this call, so it is thread-safe.
+        """
+        # bank_name is constant for the whole batch, so look it up once
+        bank_name = self.bank_names[bank_code]
+        print(f"\n--- Scraping {bank_name} ({app_id}) ---")
+        
+        # Use reviews() rather than reviews_all() so we only download as many reviews as we need
+        # We'll rely on Sort.NEWEST to get the most recent reviews
+        
+        scraped_reviews = []
+        retries = 0
+
+        while retries < self.max_retries:
+            try:
+                # reviews() pages internally until count is reached or the app
+                # runs out of reviews, so one call fetches the whole batch
+                scraped_reviews, _ = reviews(
+                    app_id,
+                    lang=self.lang,
+                    country=self.country,
+                    sort=Sort.NEWEST, # Get the most recent reviews
+                    count=self.reviews_per_bank
+                )
+                print(f"  Successfully collected {len(scraped_reviews)} {bank_code} reviews.")
+                break # Exit retry loop on success
+
+            except Exception as e:
+                retries += 1
+                print(f"  ERROR: Scrape failed for {bank_code}. Retrying in 5 seconds... (Attempt {retries}/{self.max_retries})")
+                print(f"  Details: {str(e)}")
+                if retries == self.max_retries:
+                    print(f"  Max retries reached. Skipping {bank_code}.")
+                    break
+                time.sleep(5)
+
+        # Format into this bank's own column lists (one comprehension per column)
+        n = len(scraped_reviews)
+        cols = {
+            'review_id': [r.get('reviewId') for r in scraped_reviews],
+            'user_name': [r.get('userName') for r in scraped_reviews],
+            'review_text': [r.get('content') for r in scraped_reviews],
+            'rating': [r.get('score') for r in scraped_reviews],
+            'review_date': [r.get('at') for r in scraped_reviews],
+            'thumbs_up_count': [r.get('thumbsUpCount', 0) for r in scraped_reviews],
+            'reply_content': [r.get('replyContent', None) for r in scraped_reviews],
+            'bank_code': [bank_code] * n,
+            'bank_name': [bank_name] * n,
+            'app_id': [r.get('appVersion', 'N/A') for r in scraped_reviews],
+            'source': ['Google Play Store'] * n
         }
+        print(f"  Formatted {n} {bank_code} reviews")
+        return cols
 
     def scrape_reviews(self):
         """
-        Scrape reviews for all configured apps.
+        Scrape reviews for all configured apps and stream them to the raw CSV.
+        Each bank is fetched in its own thread, since the requests are independent
+        and network-bound. Every batch is written as soon as it is ready and then
+        discarded, so memory use does not grow with the total number of reviews.
+        Returns the number of reviews saved.
         """
         print("=" * 60)
         print("STARTING GOOGLE PLAY STORE SCRAPING")
         print("=" * 60)
         
         start_time = time.time()
-        
-        for bank_code, app_id in self.app_ids.items():
-            print(f"\n--- Scraping {self.bank_names[bank_code]} ({app_id}) ---")
-            
-            # Use reviews_all for maximum reviews, but cap the number we process
-            # reviews_all is less flexible with limits, but handles pagination better
-            # We'll rely on the default Sort.NEWEST or Sort.MOST_RELEVANT
-            
-            scraped_reviews = []
-            retries = 0
-
-            while retries < self.max_retries:
-                try:
-                    # Fetching the maximum number of reviews available up to a very high limit
-                    # The library fetches batches, so we let it run and then slice
-                    full_review_list = reviews_all(
-                        app_id,
-                        lang=self.lang,
-                        country=self.country,
-                        sort=Sort.NEWEST # Get the most recent reviews
-                    )
-                    
-                    # Take up to the requested number of reviews per bank
-                    scraped_reviews = full_review_list[:self.reviews_per_bank]
-                    print(f"  Successfully collected {len(scraped_reviews)} reviews.")
-                    break # Exit retry loop on success
-
-                except Exception as e:
-                    retries += 1
-                    print(f"  ERROR: Scrape failed for {bank_code}. Retrying in 5 seconds... (Attempt {retries}/{self.max_retries})")
-                    print(f"  Details: {str(e)}")
-                    if retries == self.max_retries:
-                        print(f"  Max retries reached. Skipping {bank_code}.")
-                        break
-                    time.sleep(5)
-
-# Format and add to the main list
-            if scraped_reviews:
-                formatted_reviews = [self._format_review(review, bank_code) for review in tqdm(scraped_reviews, desc=f"  Formatting {bank_code} Reviews")]
-                self.all_reviews.extend(formatted_reviews)
+        counts = Counter()
+
+        # Ensure the raw data directory exists
+        os.makedirs(DATA_PATHS['raw'], exist_ok=True)
+        # Stream into a temp file next to the target; the previous raw CSV is only
+        # replaced once the scrape has finished and collected at least one review
+        tmp_path = DATA_PATHS['raw_reviews'] + '.tmp'
+        try:
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f, \
+                    ThreadPoolExecutor(max_workers=max(1, len(self.app_ids))) as executor:
+                writer = csv.writer(f)
+                writer.writerow(REVIEW_COLUMNS)
+                # Batches arrive in configuration order; only this thread writes to the file
+                batches = executor.map(lambda item: self._scrape_one(*item), self.app_ids.items())
+                for bank_code, cols in zip(self.app_ids, batches):
+                    writer.writerows(zip(*(cols[column] for column in REVIEW_COLUMNS)))
+                    counts[bank_code] += len(cols['review_id'])
+
+            total = sum(counts.values())
+            if total:
+                os.replace(tmp_path, DATA_PATHS['raw_reviews'])
+        finally:
+            # Nothing collected, an error or an interrupt: leave the previous file alone
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
         end_time = time.time()
         print(f"\nTotal scraping time: {end_time - start_time:.2f} seconds")
-        print(f"Total reviews collected: {len(self.all_reviews)}")
+        print(f"Total reviews collected: {total}")
         
-        return self._save_data()
+        self._report(counts)
+        return total
 
-    def _save_data(self):
-        """
-        Convert list of reviews to DataFrame and save to CSV.
-        """
-        if self.all_reviews:
-            df = pd.DataFrame(self.all_reviews)
-
-            # Ensure the raw data directory exists
-            os.makedirs(DATA_PATHS['raw'], exist_ok=True)
-            df.to_csv(DATA_PATHS['raw_reviews'], index=False, encoding='utf-8')
-            
+    def _report(self, counts):
+        """Print the per-bank scraping report."""
+        total = sum(counts.values())
+        if total:
             print("\n--- Scraping Report ---")
-            print(f"Total reviews collected: {len(df)}")
+            print(f"Total reviews collected: {total}")
             print("Reviews collected per bank:")
-            for bank_code in self.bank_names.keys():
-                count = len(df[df['bank_code'] == bank_code])
-                print(f"  {self.bank_names[bank_code]}: {count}")
+            for bank_code, bank_name in self.bank_names.items():
+                print(f"  {bank_name}: {counts.get(bank_code, 0)}")
 
             print(f"\nRaw data saved to: {DATA_PATHS['raw_reviews']}")
-
-            return df
         else:
             print("\nERROR: No reviews were collected!")
-            return pd.DataFrame()
 
 
 def main():
@@ -136,9 +161,9 @@ def main():
     # Initialize scraper
     scraper = PlayStoreScraper()
     # Run scraping process
-    df_raw = scraper.scrape_reviews()
+    total_reviews = scraper.scrape_reviews()
     
-    if not df_raw.empty:
+    if total_reviews:
         pass
 
 